@@ -0,0 +1,195 @@
+"""In-process pub/sub hub for pushing word changes to connected clients"""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import os
+import secrets
+import time
+
+# Events buffered per subscriber before it is considered too slow and dropped
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+# Recent events kept per user so reconnecting clients can resume via Last-Event-ID
+REPLAY_BUFFER_SIZE = int(os.getenv("SSE_REPLAY_SIZE", "200"))
+# Seconds after a user's last event (with no stream open) before their replay buffer is dropped
+REPLAY_IDLE_SECONDS = float(os.getenv("SSE_REPLAY_IDLE_SECONDS", "600"))
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# How long browsers wait before reconnecting a dropped stream
+RECONNECT_DELAY_MS = 3000
+
+
+def parse_event_id(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Split an "<epoch>-<sequence>" event id; None if it isn't one"""
+    epoch, sep, sequence = (value or "").rpartition("-")
+    if not sep or not epoch or not sequence.isdigit():
+        return None
+    return epoch, int(sequence)
+
+
+class WordEvent:
+    """A single committed change to one of a user's words"""
+    __slots__ = ("id", "epoch", "user_id", "type", "data")
+
+    def __init__(self, id: int, epoch: str, user_id: int, type: str, data: dict):
+        self.id = id
+        self.epoch = epoch
+        self.user_id = user_id
+        self.type = type
+        self.data = data
+
+    def encode(self) -> str:
+        """Format the event as an SSE message"""
+        payload = json.dumps(self.data, default=str, separators=(",", ":"))
+        return f"id: {self.epoch}-{self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class _UserLog:
+    """One user's event sequence and replay buffer
+
+    The epoch is new whenever the log is (re)created - after a restart, or after an
+    idle log was dropped - so ids from an earlier log never match and force a reset.
+    """
+    __slots__ = ("epoch", "sequence", "recent", "last_at")
+
+    def __init__(self, replay_size: int):
+        self.epoch = secrets.token_hex(4)
+        self.sequence = 0
+        self.recent: Deque[WordEvent] = deque(maxlen=replay_size)
+        self.last_at = time.monotonic()
+
+
+class Subscription:
+    """A connected client listening for one user's events"""
+
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+
+class WordEventHub:
+    """Fan out word events to every open stream of the same user"""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, replay_size: int = REPLAY_BUFFER_SIZE,
+                 idle_seconds: float = REPLAY_IDLE_SECONDS):
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.idle_seconds = idle_seconds
+        self._logs: Dict[int, _UserLog] = {}
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._next_prune = time.monotonic() + idle_seconds
+
+    def _log(self, user_id: int) -> _UserLog:
+        log = self._logs.get(user_id)
+        if log is None:
+            log = self._logs[user_id] = _UserLog(self.replay_size)
+        return log
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        # Fix the epoch now: the log can't be dropped while someone is subscribed
+        self._log(user_id)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: int, type: str, data: dict) -> WordEvent:
+        """Record an event and hand it to every subscriber of the user"""
+        self.prune()
+        log = self._log(user_id)
+        # Ids are sequential per user, so a gap after Last-Event-ID means lost events
+        log.sequence += 1
+        log.last_at = time.monotonic()
+        event = WordEvent(log.sequence, log.epoch, user_id, type, data)
+        log.recent.append(event)
+
+        for subscription in list(self._subscribers.get(user_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: cut it loose instead of buffering without bound.
+                # The client reconnects with Last-Event-ID and replays what it missed.
+                subscription.dropped = True
+                self.unsubscribe(subscription)
+        return event
+
+    def prune(self, force: bool = False) -> None:
+        """Drop the logs of users with no open stream and no recent events"""
+        now = time.monotonic()
+        if not force and now < self._next_prune:
+            return
+        self._next_prune = now + self.idle_seconds
+        cutoff = now - self.idle_seconds
+        for user_id in [uid for uid, log in self._logs.items() if log.last_at < cutoff]:
+            if user_id not in self._subscribers:
+                del self._logs[user_id]
+
+    def replay(self, user_id: int, last_event_id: str) -> Optional[List[WordEvent]]:
+        """Events published after last_event_id, or None if some may be missing"""
+        parsed = parse_event_id(last_event_id)
+        log = self._logs.get(user_id)
+        if parsed is None or log is None or parsed[0] != log.epoch:
+            # From another process or an older log: nothing to compare against
+            return None
+        sequence = parsed[1]
+        if sequence == log.sequence:
+            return []
+        recent = log.recent
+        if sequence > log.sequence or not recent or sequence < recent[0].id - 1:
+            return None
+        return [event for event in recent if event.id > sequence]
+
+    def last_event_id(self, user_id: int) -> str:
+        log = self._log(user_id)
+        return f"{log.epoch}-{log.sequence}"
+
+    def subscriber_count(self, user_id: Optional[int] = None) -> int:
+        if user_id is not None:
+            return len(self._subscribers.get(user_id, ()))
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+async def event_stream(hub: WordEventHub, subscription: Subscription, last_event_id: Optional[str],
+                       is_disconnected, heartbeat: float = HEARTBEAT_INTERVAL):
+    """Yield SSE frames for a subscription until the client goes away or is dropped"""
+    try:
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+        last_sent = 0
+        if last_event_id is not None:
+            backlog = hub.replay(subscription.user_id, last_event_id)
+            if backlog is None:
+                # Missed events are gone; tell the client to refetch its word list
+                reset_id = hub.last_event_id(subscription.user_id)
+                last_sent = parse_event_id(reset_id)[1]
+                yield f"id: {reset_id}\nevent: reset\ndata: {{}}\n\n"
+                backlog = []
+            else:
+                last_sent = parse_event_id(last_event_id)[1]
+            for event in backlog:
+                last_sent = event.id
+                yield event.encode()
+        while not subscription.dropped:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            # Already sent as part of the replay above
+            if event.id <= last_sent:
+                continue
+            yield event.encode()
+    finally:
+        hub.unsubscribe(subscription)
+
+
+hub = WordEventHub()
@@ -0,0 +1,146 @@
+"""Content-addressed on-disk storage for word illustrations"""
+from typing import BinaryIO, Iterator, Optional, Tuple
+import hashlib
+import os
+import re
+import tempfile
+
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", "./images")
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(5 * 1024 * 1024)))
+# Width x height cap: a few KB of compressed PNG can decode to gigabytes of bitmap
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000)))
+THUMBNAIL_SIZE = (256, 256)
+
+CONTENT_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+MEDIA_TYPES = {ext: content_type for content_type, ext in CONTENT_TYPES.items()}
+# Pillow's name for each accepted format; the stored extension comes from the bytes, not the client
+FORMAT_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+
+# "<sha256>.<ext>" for originals, "<sha256>.thumb.jpg" for thumbnails
+FILENAME_RE = re.compile(r"^([0-9a-f]{64})(\.thumb)?\.(jpg|png|gif|webp)$")
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+class UnsupportedImage(ValueError):
+    pass
+
+
+def thumbnail_name(filename: str) -> str:
+    return filename.split(".", 1)[0] + ".thumb.jpg"
+
+
+class ImageStore:
+    """Files named by the SHA-256 of their content, so identical uploads are stored once"""
+
+    def __init__(self, root: str = IMAGE_STORE_DIR, max_bytes: int = IMAGE_MAX_BYTES,
+                 max_pixels: int = IMAGE_MAX_PIXELS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+
+    def path(self, filename: str) -> str:
+        # Two levels of fan-out keep directories small
+        return os.path.join(self.root, filename[:2], filename[2:4], filename)
+
+    def resolve(self, filename: str) -> Optional[str]:
+        """Path of a stored file, or None for unknown or malformed names"""
+        if not FILENAME_RE.match(filename):
+            return None
+        path = self.path(filename)
+        return path if os.path.isfile(path) else None
+
+    def save(self, source: BinaryIO) -> str:
+        """Store an upload and its thumbnail; returns the original's filename"""
+        # Pillow is only needed at upload time, so keep it off the import path
+        from PIL import Image
+
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ImageTooLarge(f"Image is larger than {self.max_bytes} bytes")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            try:
+                with Image.open(tmp_path) as image:
+                    # Only the header has been read so far; check the size before decoding anything
+                    width, height = image.size
+                    if width * height > self.max_pixels:
+                        raise ImageTooLarge(f"Image is larger than {self.max_pixels} pixels")
+                    ext = FORMAT_EXTENSIONS.get(image.format)
+                    if ext is None:
+                        raise UnsupportedImage(f"Unsupported image format: {image.format}")
+                    filename = f"{digest.hexdigest()}.{ext}"
+                    path = self.path(filename)
+                    if os.path.exists(path):
+                        # Same bytes already stored (by anyone), thumbnail included
+                        return filename
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    self._write_thumbnail(image, self.path(thumbnail_name(filename)))
+            except Image.DecompressionBombError as e:
+                # Pillow's own limit; not an OSError, so it would otherwise surface as a 500
+                raise ImageTooLarge(str(e))
+            os.replace(tmp_path, path)
+            return filename
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _write_thumbnail(self, image, thumb_path: str) -> None:
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale, so the full-size bitmap is never built
+        if image.format == "JPEG":
+            image.draft(None, THUMBNAIL_SIZE)
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(thumb_path), prefix=".thumb-")
+        with os.fdopen(fd, "wb") as tmp:
+            image.save(tmp, "JPEG", quality=85)
+        os.replace(tmp_path, thumb_path)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single "bytes=start-end" range into inclusive offsets, or None to send everything"""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header or "")
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if start:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    else:
+        start, end = max(size - int(end), 0), size - 1
+    if start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Read bytes start..end (inclusive) of a file in chunks"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+image_store = ImageStore()
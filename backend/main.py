@@ -1,16 +1,29 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, File, Header, Query, Request, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean
-from sqlalchemy.orm import sessionmaker, Session, declarative_base
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Boolean, delete, func, insert, inspect, select, update
+from sqlalchemy.exc import DatabaseError, IntegrityError, OperationalError
+from sqlalchemy.orm import Session, declarative_base
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, EmailStr, ConfigDict
 from datetime import datetime, timedelta
 from typing import List, Optional
 from dotenv import load_dotenv
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-import uvicorn
 import os
+import re
+import secrets
+
+from events import hub, event_stream
+from sharding import ShardRouter, normalize_url, parse_replica_urls, parse_shard_urls
+from word_cache import word_cache, make_row, page
+from image_store import (
+    image_store, ImageTooLarge, UnsupportedImage, CONTENT_TYPES, MEDIA_TYPES, FILENAME_RE,
+    IMAGE_MAX_BYTES, iter_file_range, parse_range, thumbnail_name
+)
 
 # Load environment variables
 load_dotenv()
@@ -19,22 +32,28 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  # 30 days
+# Stream tickets go in a URL (EventSource can't send headers), so they only open streams and expire fast
+STREAM_TICKET_SCOPE = "stream"
+STREAM_TICKET_SECONDS = 60
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+# Shared secret for operator endpoints (X-Ops-Token header); unset disables them
+OPS_TOKEN = os.getenv("OPS_TOKEN", "")
 
 # Database setup
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./wilddict.db")
-
-# For Railway PostgreSQL compatibility
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DATABASE_URL = normalize_url(os.getenv("DATABASE_URL", "sqlite:///./wilddict.db"))
+# "create" makes missing tables, "check" only verifies they exist, "off" skips both
+SCHEMA_MODE = os.getenv("SCHEMA_MODE", "create")
+SCHEMA_MODES = ("create", "check", "off")
+# Connections opened per engine at startup so the first requests don't pay for them
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", "1"))
+
+# Built by init_db() when the app starts, not at import time
+shard_router: Optional[ShardRouter] = None
+engine = None
+SessionLocal = None
 Base = declarative_base()
 
 # Database models
@@ -47,6 +66,8 @@ class UserDB(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    shard = None  # Resolved per request by get_current_user, not stored here
 
 class WordDB(Base):
     __tablename__ = "words"
@@ -61,7 +82,86 @@ class WordDB(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     user_id = Column(Integer, nullable=False, index=True)  # Required: link words to users
 
-Base.metadata.create_all(bind=engine)
+class WordImageDB(Base):
+    __tablename__ = "word_images"
+    
+    # Same shard as the word, so deleting the word drops its link in the same statement
+    word_id = Column(Integer, ForeignKey("words.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    filename = Column(String, nullable=False)  # Content-addressed name in the image store
+
+class UserShardDB(Base):
+    __tablename__ = "user_shards"
+    
+    user_id = Column(Integer, primary_key=True)
+    shard = Column(String, nullable=False)
+
+DIRECTORY_TABLES = [UserDB.__table__, UserShardDB.__table__]
+SHARD_TABLES = [WordDB.__table__, WordImageDB.__table__]
+
+def init_db(schema_mode: str = SCHEMA_MODE) -> ShardRouter:
+    """Build the engines and prepare the schema; safe to call more than once"""
+    global shard_router, engine, SessionLocal
+    # A typo must not silently skip schema work and start against an empty database
+    if schema_mode not in SCHEMA_MODES:
+        raise ValueError(f"SCHEMA_MODE must be one of {', '.join(SCHEMA_MODES)}, got {schema_mode!r}")
+    if shard_router is not None:
+        return shard_router
+
+    # Users live in the directory database; words are spread over the shards.
+    # Without SHARD_DATABASE_URLS everything stays in DATABASE_URL.
+    # REPLICA_DATABASE_URLS adds read replicas for the word shards.
+    router = ShardRouter(
+        DATABASE_URL,
+        parse_shard_urls(os.getenv("SHARD_DATABASE_URLS", "")),
+        parse_replica_urls(os.getenv("REPLICA_DATABASE_URLS", ""))
+    )
+    schema = [(router.directory_engine, DIRECTORY_TABLES)]
+    schema += [(shard_engine, SHARD_TABLES) for shard_engine in router.unique_engines()]
+    for schema_engine, tables in schema:
+        if schema_mode == "create":
+            try:
+                Base.metadata.create_all(bind=schema_engine, tables=tables)
+            except DatabaseError:
+                # Another worker created the same tables between our check and CREATE; check again
+                Base.metadata.create_all(bind=schema_engine, tables=tables)
+        elif schema_mode == "check":
+            existing = set(inspect(schema_engine).get_table_names())
+            missing = [table.name for table in tables if table.name not in existing]
+            if missing:
+                raise RuntimeError(f"Database {schema_engine.url!r} is missing tables: {', '.join(missing)}")
+
+    shard_router = router
+    engine = router.directory_engine
+    SessionLocal = router.DirectorySession
+    return router
+
+def prewarm(router: ShardRouter, connections: int = DB_POOL_PREWARM):
+    """Open pool connections and load the bcrypt backend before traffic arrives"""
+    primaries = {id(e): e for e in [router.directory_engine, *router.unique_engines()]}
+    for primary in primaries.values():
+        opened = [primary.connect() for _ in range(connections)]
+        for connection in opened:
+            connection.close()
+    for pool in router.replicas.values():
+        for index, replica in enumerate(pool.engines):
+            try:
+                replica.connect().close()
+            except OperationalError:
+                # A replica being down must not stop the app from starting
+                pool.mark_down(index)
+    pwd_context.handler("bcrypt").get_backend()
+
+def dispose_db():
+    global shard_router, engine, SessionLocal
+    if shard_router is None:
+        return
+    for pool in shard_router.replicas.values():
+        for replica in pool.engines:
+            replica.dispose()
+    for shard_engine in {id(e): e for e in [engine, *shard_router.unique_engines()]}.values():
+        shard_engine.dispose()
+    shard_router = engine = SessionLocal = None
 
 # Pydantic models for authentication
 class UserRegister(BaseModel):
@@ -101,19 +201,65 @@ class WordBase(BaseModel):
 class WordCreate(WordBase):
     pass
 
+class WordUpdate(BaseModel):
+    word: Optional[str] = None
+    definition: Optional[str] = None
+    example: Optional[str] = None
+    language: Optional[str] = None
+    source_language: Optional[str] = None
+    tags: Optional[List[str]] = None
+
 class Word(WordBase):
     id: int
     created_at: datetime
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connecting and hashing setup are blocking, keep them off the event loop
+    router = await run_in_threadpool(init_db)
+    await run_in_threadpool(prewarm, router)
+    yield
+    dispose_db()
+
 # FastAPI app
 app = FastAPI(
     title="WildDict API",
     description="AI-powered visual dictionary backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+class UploadSizeLimit:
+    """Refuse oversized image uploads from their Content-Length, before the body is spooled"""
+    PATH_RE = re.compile(r"^/api/words/[^/]+/image$")
+    # Room for the multipart boundary and part headers around the file itself
+    MULTIPART_OVERHEAD = 64 * 1024
+
+    def __init__(self, app, max_bytes: int = IMAGE_MAX_BYTES):
+        self.app = app
+        self.max_body = max_bytes + self.MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "PUT" and self.PATH_RE.match(scope["path"]):
+            length = dict(scope["headers"]).get(b"content-length")
+            if length is None:
+                # Chunked uploads can't be sized up front
+                response = JSONResponse({"detail": "Content-Length required"}, status_code=411)
+                return await response(scope, receive, send)
+            if not length.isdigit() or int(length) > self.max_body:
+                response = JSONResponse(
+                    {"detail": f"Image is larger than {IMAGE_MAX_BYTES} bytes"}, status_code=413
+                )
+                return await response(scope, receive, send)
+        await self.app(scope, receive, send)
+
+# Added before CORS so that its 411/413 answers still carry CORS headers
+app.add_middleware(UploadSizeLimit)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -148,35 +294,92 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(lambda: next(get_db()))) -> UserDB:
+# Dependencies
+def get_directory_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def authenticate(token: str, db: Session, scope: Optional[str] = None) -> UserDB:
+    """Resolve a token to its user, with the shard placement attached
+
+    Access tokens carry no scope; narrower tokens (stream tickets) only pass where their scope is asked for.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("scope") != scope:
             raise credentials_exception
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
     
-    user = db.query(UserDB).filter(UserDB.email == token_data.email).first()
-    if user is None:
+    # Fetch the shard placement in the same round trip as the user
+    row = db.query(UserDB, UserShardDB.shard).outerjoin(
+        UserShardDB, UserShardDB.user_id == UserDB.id
+    ).filter(UserDB.email == token_data.email).first()
+    if row is None:
         raise credentials_exception
+    user, placement = row
+    user.shard = shard_router.shard_for(user.id, placement)
     return user
 
-# Dependency
-def get_db():
-    db = SessionLocal()
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_directory_db)) -> UserDB:
+    return authenticate(credentials.credentials, db)
+
+def get_db(current_user: UserDB = Depends(get_current_user)):
+    """Primary session on the shard that holds the current user's words"""
+    # Mark before the write happens so the user's next read can't race to a lagging replica
+    shard_router.writes.mark(current_user.id)
+    db = shard_router.session(current_user.shard)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(current_user: UserDB = Depends(get_current_user)):
+    """Read-only session for the current user's shard, served by a replica when possible"""
+    db = shard_router.read_session(current_user.shard, current_user.id)
     try:
         yield db
     finally:
         db.close()
 
+# Images are served by content hash, so their URLs never change meaning
+IMAGE_URL_PREFIX = "/api/images/"
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Internal nginx location mapped onto IMAGE_STORE_DIR; when set, nginx sends the file itself
+IMAGE_ACCEL_REDIRECT = os.getenv("IMAGE_ACCEL_REDIRECT", "")
+
+def image_urls(filename: Optional[str]) -> dict:
+    if not filename:
+        return {"image_url": None, "thumbnail_url": None}
+    return {
+        "image_url": IMAGE_URL_PREFIX + filename,
+        "thumbnail_url": IMAGE_URL_PREFIX + thumbnail_name(filename)
+    }
+
+def word_from_row(row) -> Word:
+    """Build the response model from a cached row without re-validating it"""
+    return Word.model_construct(
+        id=row.id,
+        word=row.word,
+        definition=row.definition,
+        example=row.example,
+        language=row.language,
+        source_language=row.source_language,
+        tags=list(row.tags),
+        created_at=row.created_at,
+        **image_urls(row.image)
+    )
+
 # Routes
 @app.get("/")
 async def root():
@@ -188,7 +391,7 @@ async def root():
 
 # Authentication routes
 @app.post("/api/auth/register", response_model=Token)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: Session = Depends(get_directory_db)):
     """Register a new user"""
     # Check if user already exists
     existing_user = db.query(UserDB).filter(
@@ -216,19 +419,21 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
+    db.flush()
+    # Pin the user to a shard so adding shards later never moves their words implicitly
+    db.add(UserShardDB(user_id=db_user.id, shard=shard_router.shard_for(db_user.id)))
     db.commit()
-    db.refresh(db_user)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.email}, expires_delta=access_token_expires
+        data={"sub": user_data.email}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/api/auth/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: Session = Depends(get_directory_db)):
     """Login user"""
     user = db.query(UserDB).filter(UserDB.email == user_data.email).first()
     
@@ -264,10 +469,28 @@ async def get_words(
     limit: int = 100,
     language: Optional[str] = None,
     current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all words for the current user with optional filtering"""
-    query = db.query(WordDB).filter(WordDB.user_id == current_user.id)
+    rows = word_cache.get(current_user.id) if word_cache.enabled else None
+    if rows is None and word_cache.should_load(current_user.id):
+        # Load the whole word set once; later pages and language filters come from memory
+        rows = [
+            make_row(*values)
+            for values in db.query(
+                WordDB.id, WordDB.word, WordDB.definition, WordDB.example, WordDB.language,
+                WordDB.source_language, WordDB.tags, WordDB.created_at, WordImageDB.filename
+            ).outerjoin(WordImageDB, WordImageDB.word_id == WordDB.id).filter(
+                WordDB.user_id == current_user.id
+            ).order_by(WordDB.id)
+        ]
+        word_cache.put(current_user.id, rows)
+    if rows is not None:
+        return [word_from_row(row) for row in page(rows, skip, limit, language)]
+    
+    query = db.query(WordDB, WordImageDB.filename).outerjoin(
+        WordImageDB, WordImageDB.word_id == WordDB.id
+    ).filter(WordDB.user_id == current_user.id).order_by(WordDB.id)
     
     if language:
         query = query.filter(WordDB.language == language)
@@ -276,7 +499,7 @@ async def get_words(
     
     # Convert tags from string to list
     result = []
-    for word in words:
+    for word, image in words:
         word_dict = {
             "id": word.id,
             "word": word.word,
@@ -285,26 +508,86 @@ async def get_words(
             "language": word.language,
             "source_language": word.source_language,
             "tags": word.tags.split(",") if word.tags else [],
-            "created_at": word.created_at
+            "created_at": word.created_at,
+            **image_urls(image)
         }
         result.append(Word(**word_dict))
     
     return result
 
+@app.post("/api/words/stream/ticket")
+async def create_stream_ticket(current_user: UserDB = Depends(get_current_user)):
+    """Short-lived token for opening the word stream from EventSource
+    
+    EventSource can't send headers, so the stream takes its credential in the URL,
+    where access logs record it. A ticket only opens streams and expires in a minute.
+    """
+    ticket = create_access_token(
+        data={"sub": current_user.email, "scope": STREAM_TICKET_SCOPE},
+        expires_delta=timedelta(seconds=STREAM_TICKET_SECONDS)
+    )
+    return {"ticket": ticket, "expires_in": STREAM_TICKET_SECONDS}
+
+@app.get("/api/words/stream")
+async def stream_words(
+    request: Request,
+    ticket: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    resume: Optional[str] = Query(None, alias="last_event_id"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Server-Sent Events stream of the current user's word changes
+    
+    Authenticates with the usual bearer header, or with ?ticket= from
+    POST /api/words/stream/ticket for EventSource. A client reopening the
+    stream itself (with a fresh ticket) passes ?last_event_id= to resume.
+    """
+    if credentials:
+        token, scope = credentials.credentials, None
+    elif ticket:
+        token, scope = ticket, STREAM_TICKET_SCOPE
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Yield dependencies are only cleaned up when the response ends, so a
+    # get_directory_db session would hold a pooled connection for the stream's
+    # whole life. Authenticate with a session closed before streaming starts.
+    db = SessionLocal()
+    try:
+        current_user = authenticate(token, db, scope)
+    finally:
+        db.close()
+    
+    subscription = hub.subscribe(current_user.id)
+    return StreamingResponse(
+        event_stream(hub, subscription, last_event_id or resume, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Keep nginx from buffering the stream
+        },
+    )
+
 @app.get("/api/words/{word_id}", response_model=Word)
 async def get_word(
     word_id: int,
     current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific word by ID (only if it belongs to current user)"""
-    word = db.query(WordDB).filter(
+    row = db.query(WordDB, WordImageDB.filename).outerjoin(
+        WordImageDB, WordImageDB.word_id == WordDB.id
+    ).filter(
         WordDB.id == word_id,
         WordDB.user_id == current_user.id
     ).first()
     
-    if not word:
+    if not row:
         raise HTTPException(status_code=404, detail="Word not found")
+    word, image = row
     
     word_dict = {
         "id": word.id,
@@ -314,7 +597,8 @@ async def get_word(
         "language": word.language,
         "source_language": word.source_language,
         "tags": word.tags.split(",") if word.tags else [],
-        "created_at": word.created_at
+        "created_at": word.created_at,
+        **image_urls(image)
     }
     
     return Word(**word_dict)
@@ -351,7 +635,36 @@ async def create_word(
         "created_at": db_word.created_at
     }
     
-    return Word(**word_dict)
+    result = Word(**word_dict)
+    word_cache.invalidate(current_user.id)
+    hub.publish(current_user.id, "created", result.model_dump(mode="json"))
+    return result
+
+def apply_word_update(db: Session, user_id: int, word_id: int, values: dict) -> Word:
+    """Update a user's word with a single UPDATE ... RETURNING; 404 if no row matched"""
+    if "tags" in values:
+        values["tags"] = ",".join(values["tags"]) if values["tags"] else ""
+    # The image link lives in another table; a scalar subquery brings it back in the same statement
+    image = select(WordImageDB.filename).where(WordImageDB.word_id == WordDB.id).scalar_subquery()
+    row = db.execute(
+        update(WordDB)
+        .where(WordDB.id == word_id, WordDB.user_id == user_id)
+        .values(**values)
+        .returning(
+            WordDB.id, WordDB.word, WordDB.definition, WordDB.example, WordDB.language,
+            WordDB.source_language, WordDB.tags, WordDB.created_at, image
+        )
+        .execution_options(synchronize_session=False)
+    ).first()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Word not found")
+    db.commit()
+    
+    result = word_from_row(make_row(*row))
+    word_cache.invalidate(user_id)
+    hub.publish(user_id, "updated", result.model_dump(mode="json"))
+    return result
 
 @app.put("/api/words/{word_id}", response_model=Word)
 async def update_word(
@@ -361,6 +674,63 @@ async def update_word(
     db: Session = Depends(get_db)
 ):
     """Update an existing word (only if it belongs to current user)"""
+    return apply_word_update(db, current_user.id, word_id, word.model_dump())
+
+@app.patch("/api/words/{word_id}", response_model=Word)
+async def patch_word(
+    word_id: int,
+    word: WordUpdate,
+    current_user: UserDB = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Update only the fields present in the body (only if the word belongs to current user)"""
+    # Explicit nulls are ignored: every column of a word is required
+    values = word.model_dump(exclude_unset=True, exclude_none=True)
+    if not values:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+    return apply_word_update(db, current_user.id, word_id, values)
+
+@app.delete("/api/words/{word_id}")
+async def delete_word(
+    word_id: int,
+    current_user: UserDB = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete a word (only if it belongs to current user)"""
+    deleted = db.execute(
+        delete(WordDB)
+        .where(WordDB.id == word_id, WordDB.user_id == current_user.id)
+        .returning(WordDB.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Word not found")
+    
+    # The image link goes with the word (ON DELETE CASCADE); the stored file may be shared, so it stays
+    db.commit()
+    word_cache.invalidate(current_user.id)
+    hub.publish(current_user.id, "deleted", {"id": word_id})
+    
+    return {"message": "Word deleted successfully"}
+
+@app.put("/api/words/{word_id}/image", response_model=Word)
+async def upload_word_image(
+    word_id: int,
+    file: UploadFile = File(...),
+    current_user: UserDB = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Attach an illustration to a word, replacing any previous one"""
+    if file.content_type not in CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Supported image types: {', '.join(CONTENT_TYPES)}"
+        )
+    
     db_word = db.query(WordDB).filter(
         WordDB.id == word_id,
         WordDB.user_id == current_user.id
@@ -369,15 +739,23 @@ async def update_word(
     if not db_word:
         raise HTTPException(status_code=404, detail="Word not found")
     
-    db_word.word = word.word
-    db_word.definition = word.definition
-    db_word.example = word.example
-    db_word.language = word.language
-    db_word.source_language = word.source_language
-    db_word.tags = ",".join(word.tags) if word.tags else ""
-    
-    db.commit()
-    db.refresh(db_word)
+    # Hashing, writing and thumbnailing are blocking, keep them off the event loop
+    try:
+        filename = await run_in_threadpool(image_store.save, file.file)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except UnsupportedImage as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+    except OSError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File is not a valid image")
+    
+    db.merge(WordImageDB(word_id=db_word.id, user_id=current_user.id, filename=filename))
+    try:
+        db.flush()
+    except IntegrityError:
+        # The word was deleted while the upload was being stored
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Word not found")
     
     word_dict = {
         "id": db_word.id,
@@ -387,46 +765,127 @@ async def update_word(
         "language": db_word.language,
         "source_language": db_word.source_language,
         "tags": db_word.tags.split(",") if db_word.tags else [],
-        "created_at": db_word.created_at
+        "created_at": db_word.created_at,
+        **image_urls(filename)
     }
+    db.commit()
     
-    return Word(**word_dict)
+    result = Word(**word_dict)
+    word_cache.invalidate(current_user.id)
+    hub.publish(current_user.id, "updated", result.model_dump(mode="json"))
+    return result
 
-@app.delete("/api/words/{word_id}")
-async def delete_word(
+@app.delete("/api/words/{word_id}/image")
+async def delete_word_image(
     word_id: int,
     current_user: UserDB = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a word (only if it belongs to current user)"""
-    db_word = db.query(WordDB).filter(
-        WordDB.id == word_id,
-        WordDB.user_id == current_user.id
+    """Remove a word's illustration (the stored file stays, it may be shared)"""
+    deleted = db.execute(
+        delete(WordImageDB)
+        .where(WordImageDB.word_id == word_id, WordImageDB.user_id == current_user.id)
+        .returning(WordImageDB.word_id)
+        .execution_options(synchronize_session=False)
     ).first()
     
-    if not db_word:
-        raise HTTPException(status_code=404, detail="Word not found")
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Image not found")
     
-    db.delete(db_word)
+    # Other open tabs need the rest of the word to redraw it without the image
+    row = db.execute(
+        select(
+            WordDB.id, WordDB.word, WordDB.definition, WordDB.example, WordDB.language,
+            WordDB.source_language, WordDB.tags, WordDB.created_at
+        ).where(WordDB.id == word_id)
+    ).first()
     db.commit()
     
-    return {"message": "Word deleted successfully"}
+    word_cache.invalidate(current_user.id)
+    if row:
+        hub.publish(current_user.id, "updated", word_from_row(make_row(*row)).model_dump(mode="json"))
+    return {"message": "Image deleted successfully"}
+
+@app.get("/api/images/{filename}")
+async def get_image(filename: str, request: Request):
+    """Serve a stored image or thumbnail by its content-addressed name"""
+    path = image_store.resolve(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    # The name is the content hash, so it doubles as a strong ETag that never expires
+    etag = f'"{filename}"'
+    headers = {"Cache-Control": IMAGE_CACHE_CONTROL, "ETag": etag, "Accept-Ranges": "bytes"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    media_type = MEDIA_TYPES[FILENAME_RE.match(filename).group(3)]
+    if IMAGE_ACCEL_REDIRECT:
+        # nginx serves the file with sendfile and handles Range itself
+        location = IMAGE_ACCEL_REDIRECT + os.path.relpath(path, image_store.root).replace(os.sep, "/")
+        return Response(media_type=media_type, headers={**headers, "X-Accel-Redirect": location})
+    
+    size = os.path.getsize(path)
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    if byte_range:
+        start, end = byte_range
+        return StreamingResponse(
+            iter_file_range(path, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers={
+                **headers,
+                "Content-Range": f"bytes {start}-{end}/{size}",
+                "Content-Length": str(end - start + 1)
+            }
+        )
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 @app.get("/api/stats")
 async def get_stats(
     current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get statistics for current user's words"""
-    total_words = db.query(WordDB).filter(WordDB.user_id == current_user.id).count()
-    languages = db.query(WordDB.language).filter(WordDB.user_id == current_user.id).distinct().all()
+    # A stats miss doesn't load the word set, so it mustn't count towards the hit ratio either
+    rows = word_cache.get(current_user.id, record=False) if word_cache.enabled else None
+    if rows is not None:
+        languages = list(dict.fromkeys(row.language for row in rows))
+        return {
+            "total_words": len(rows),
+            "languages": languages,
+            "language_count": len(languages)
+        }
+    
+    # Per-language counts give both the total and the language list in one query
+    counts = db.query(WordDB.language, func.count(WordDB.id)).filter(
+        WordDB.user_id == current_user.id
+    ).group_by(WordDB.language).all()
     
     return {
-        "total_words": total_words,
-        "languages": [lang[0] for lang in languages],
-        "language_count": len(languages)
+        "total_words": sum(count for _, count in counts),
+        "languages": [lang for lang, _ in counts],
+        "language_count": len(counts)
     }
 
+def require_ops_token(x_ops_token: Optional[str] = Header(None)):
+    """Let only operators through; user tokens don't count"""
+    if not OPS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_ops_token or not secrets.compare_digest(x_ops_token, OPS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid ops token")
+
+@app.get("/api/cache/stats", dependencies=[Depends(require_ops_token)])
+async def get_cache_stats():
+    """Size and hit ratio of this process's word cache (covers every user, so ops only)"""
+    return word_cache.stats()
+
 @app.post("/api/seed-demo-data")
 async def seed_demo_data(
     current_user: UserDB = Depends(get_current_user),
@@ -482,22 +941,34 @@ async def seed_demo_data(
         }
     ]
     
-    added_count = 0
-    for word_data in demo_words:
-        word = WordDB(
-            word=word_data["word"],
-            definition=word_data["definition"],
-            example=word_data["example"],
-            language=word_data["language"],
-            source_language=word_data["source_language"],
-            tags=word_data["tags"],
-            user_id=current_user.id
-        )
-        db.add(word)
-        added_count += 1
-    
+    # One multi-row INSERT ... RETURNING instead of a statement per word.
+    # Row order of RETURNING isn't guaranteed, so match rows back by word.
+    inserted = db.execute(
+        insert(WordDB).returning(WordDB.id, WordDB.word, WordDB.created_at),
+        [dict(word_data, user_id=current_user.id) for word_data in demo_words]
+    ).all()
+    words_by_name = {word_data["word"]: word_data for word_data in demo_words}
+    added_count = len(inserted)
+    payloads = [
+        Word(
+            id=word_id,
+            word=word,
+            definition=words_by_name[word]["definition"],
+            example=words_by_name[word]["example"],
+            language=words_by_name[word]["language"],
+            source_language=words_by_name[word]["source_language"],
+            tags=words_by_name[word]["tags"].split(","),
+            created_at=created_at
+        ).model_dump(mode="json")
+        for word_id, word, created_at in sorted(inserted)
+    ]
     db.commit()
+    word_cache.invalidate(current_user.id)
+    for payload in payloads:
+        hub.publish(current_user.id, "created", payload)
     return {"message": f"Added {added_count} demo words for {current_user.username}", "added": added_count}
 
 if __name__ == "__main__":
+    # Development server with auto-reload; production uses serve.py
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
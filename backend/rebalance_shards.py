@@ -0,0 +1,134 @@
+"""Move a user's words between shards and show how users are spread
+
+Usage:
+    python rebalance_shards.py status
+    python rebalance_shards.py move <user_id> <shard>
+    python rebalance_shards.py pin-all [shard]
+
+Run a move while the user is not writing: words created on the old shard
+after the copy starts are not carried over. Moved words get new ids.
+
+Before turning on SHARD_DATABASE_URLS for an existing database, list that
+database as one of the shards and run `pin-all <its name>` so users
+registered earlier keep finding their words there.
+"""
+import sys
+
+import main
+from main import UserDB, UserShardDB, WordDB, WordImageDB
+
+
+def current_shard(directory, user_id: int) -> str:
+    placement = directory.query(UserShardDB.shard).filter(UserShardDB.user_id == user_id).scalar()
+    return main.shard_router.shard_for(user_id, placement)
+
+
+def move_user(user_id: int, target: str):
+    """Copy a user's words to target, repoint the directory, then clean up the source"""
+    if target not in main.shard_router.engines:
+        raise SystemExit(f"Unknown shard {target!r}; configured: {', '.join(main.shard_router.names)}")
+
+    directory = main.SessionLocal()
+    try:
+        if directory.get(UserDB, user_id) is None:
+            raise SystemExit(f"User {user_id} not found")
+        source = current_shard(directory, user_id)
+        if source == target or main.shard_router.engines[source] is main.shard_router.engines[target]:
+            print(f"User {user_id} already on {target}")
+            directory.merge(UserShardDB(user_id=user_id, shard=target))
+            directory.commit()
+            return
+
+        source_db = main.shard_router.session(source)
+        target_db = main.shard_router.session(target)
+        try:
+            words = source_db.query(WordDB).filter(WordDB.user_id == user_id).all()
+            images = dict(source_db.query(WordImageDB.word_id, WordImageDB.filename).filter(
+                WordImageDB.user_id == user_id
+            ).all())
+
+            # Rows left on the target by an interrupted earlier move are stale
+            for model in (WordDB, WordImageDB):
+                target_db.query(model).filter(model.user_id == user_id).delete(synchronize_session=False)
+            copies = [
+                WordDB(
+                    word=word.word,
+                    definition=word.definition,
+                    example=word.example,
+                    language=word.language,
+                    source_language=word.source_language,
+                    tags=word.tags,
+                    created_at=word.created_at,
+                    user_id=user_id
+                )
+                for word in words
+            ]
+            target_db.add_all(copies)
+            target_db.flush()
+            # Image files are shared by content hash; only the links follow the new word ids
+            target_db.add_all([
+                WordImageDB(word_id=copy.id, user_id=user_id, filename=images[word.id])
+                for word, copy in zip(words, copies)
+                if word.id in images
+            ])
+            target_db.commit()
+
+            directory.merge(UserShardDB(user_id=user_id, shard=target))
+            directory.commit()
+
+            for model in (WordDB, WordImageDB):
+                source_db.query(model).filter(model.user_id == user_id).delete(synchronize_session=False)
+            source_db.commit()
+            print(f"Moved {len(words)} words of user {user_id}: {source} -> {target}")
+        finally:
+            source_db.close()
+            target_db.close()
+    finally:
+        directory.close()
+
+
+def pin_all(shard: str = None):
+    """Record a placement for users that have none: the given shard, else their ring shard"""
+    if shard is not None and shard not in main.shard_router.engines:
+        raise SystemExit(f"Unknown shard {shard!r}; configured: {', '.join(main.shard_router.names)}")
+
+    directory = main.SessionLocal()
+    try:
+        unplaced = directory.query(UserDB.id).outerjoin(
+            UserShardDB, UserShardDB.user_id == UserDB.id
+        ).filter(UserShardDB.user_id.is_(None)).all()
+        directory.add_all([
+            UserShardDB(user_id=user_id, shard=shard or main.shard_router.shard_for(user_id))
+            for (user_id,) in unplaced
+        ])
+        directory.commit()
+        print(f"Pinned {len(unplaced)} users")
+    finally:
+        directory.close()
+
+
+def status():
+    directory = main.SessionLocal()
+    try:
+        placements = dict(directory.query(UserShardDB.user_id, UserShardDB.shard).all())
+        counts = {name: 0 for name in main.shard_router.names}
+        for (user_id,) in directory.query(UserDB.id).all():
+            counts[main.shard_router.shard_for(user_id, placements.get(user_id))] += 1
+    finally:
+        directory.close()
+    for name, count in counts.items():
+        print(f"{name}: {count} users")
+
+
+if __name__ == "__main__":
+    main.init_db()
+    args = sys.argv[1:]
+    if args == ["status"]:
+        status()
+    elif args and args[0] == "pin-all" and len(args) <= 2:
+        pin_all(*args[1:])
+    elif len(args) == 3 and args[0] == "move":
+        move_user(int(args[1]), args[2])
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,62 @@
+"""Read replicas with health tracking and read-your-writes stickiness"""
+from typing import Dict, List, Optional
+from sqlalchemy.orm import sessionmaker, Session
+import itertools
+import os
+import time
+
+# Seconds after a write during which the same user reads from the primary
+STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+# Seconds a replica that failed to connect is skipped before being retried
+RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+
+class ReplicaPool:
+    """Round-robin over the replicas of one primary, skipping recently failed ones"""
+
+    def __init__(self, engines: list, retry_seconds: float = RETRY_SECONDS):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._sessionmakers = [
+            sessionmaker(autocommit=False, autoflush=False, bind=engine) for engine in engines
+        ]
+        self._down_until: Dict[int, float] = {}
+        self._next = itertools.count()
+
+    def candidates(self) -> List[int]:
+        """Healthy replica indexes, starting from the next one in rotation"""
+        now = time.monotonic()
+        start = next(self._next)
+        order = [(start + offset) % len(self.engines) for offset in range(len(self.engines))]
+        return [index for index in order if self._down_until.get(index, 0) <= now]
+
+    def session(self, index: int) -> Session:
+        return self._sessionmakers[index]()
+
+    def mark_down(self, index: int) -> None:
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    def healthy_count(self) -> int:
+        return len(self.candidates())
+
+
+class WriteTracker:
+    """Remember which users wrote recently so their reads can see their own writes"""
+
+    def __init__(self, window: float = STICKY_SECONDS):
+        self.window = window
+        self._last_write: Dict[int, float] = {}
+
+    def mark(self, user_id: int) -> None:
+        now = time.monotonic()
+        self._last_write[user_id] = now
+        # Forget expired entries now and then so the dict stays small
+        if len(self._last_write) > 1024:
+            cutoff = now - self.window
+            self._last_write = {uid: at for uid, at in self._last_write.items() if at > cutoff}
+
+    def is_recent(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        last = self._last_write.get(user_id)
+        return last is not None and time.monotonic() - last < self.window
@@ -1,30 +1,24 @@
 """
 Скрипт для заполнения базы данных тестовыми пользователями и их словами
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from passlib.context import CryptContext
 from datetime import datetime
-import os
 from dotenv import load_dotenv
 
 # Загрузка переменных окружения
 load_dotenv()
 
-# Настройка базы данных
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./wilddict.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
 # Настройка хеширования паролей
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Импорт моделей из main.py
-from main import UserDB, WordDB, Base
+# Импорт моделей из main.py; базы (директория пользователей и шарды слов) те же, что у API
+import main
+from main import UserDB, UserShardDB, WordDB
 
 def seed_database():
     """Заполнение базы данных тестовыми данными"""
-    db = SessionLocal()
+    router = main.init_db()
+    db = main.SessionLocal()
     
     try:
         # Создание тестовых пользователей
@@ -64,6 +58,9 @@ def seed_database():
                 is_active=True
             )
             db.add(user)
+            db.flush()
+            # Закрепляем пользователя за шардом, как это делает /api/auth/register
+            db.add(UserShardDB(user_id=user.id, shard=router.shard_for(user.id)))
             db.commit()
             db.refresh(user)
             users.append(user)
@@ -160,32 +157,40 @@ def seed_database():
             (users[2], charlie_words)
         ]
         
+        placements = dict(db.query(UserShardDB.user_id, UserShardDB.shard).filter(
+            UserShardDB.user_id.in_([user.id for user in users])
+        ).all())
         for user, words_list in words_by_user:
-            for word_data in words_list:
-                # Проверяем, существует ли слово у этого пользователя
-                existing_word = db.query(WordDB).filter(
-                    WordDB.word == word_data["word"],
-                    WordDB.user_id == user.id
-                ).first()
-                
-                if existing_word:
-                    print(f"  Слово '{word_data['word']}' у пользователя {user.username} уже существует, пропускаем...")
-                    continue
-                
-                word = WordDB(
-                    word=word_data["word"],
-                    definition=word_data["definition"],
-                    example=word_data["example"],
-                    language=word_data["language"],
-                    source_language=word_data["source_language"],
-                    tags=word_data["tags"],
-                    user_id=user.id
-                )
-                db.add(word)
-            
-            db.commit()
+            # Слова пользователя лежат на его шарде, а не в DATABASE_URL
+            shard_db = router.session(router.shard_for(user.id, placements.get(user.id)))
+            try:
+                for word_data in words_list:
+                    # Проверяем, существует ли слово у этого пользователя
+                    existing_word = shard_db.query(WordDB).filter(
+                        WordDB.word == word_data["word"],
+                        WordDB.user_id == user.id
+                    ).first()
+
+                    if existing_word:
+                        print(f"  Слово '{word_data['word']}' у пользователя {user.username} уже существует, пропускаем...")
+                        continue
+
+                    word = WordDB(
+                        word=word_data["word"],
+                        definition=word_data["definition"],
+                        example=word_data["example"],
+                        language=word_data["language"],
+                        source_language=word_data["source_language"],
+                        tags=word_data["tags"],
+                        user_id=user.id
+                    )
+                    shard_db.add(word)
+
+                shard_db.commit()
+            finally:
+                shard_db.close()
             print(f"✅ Добавлено {len(words_list)} слов для пользователя {user.username}")
-        
+
         print("\n🎉 База данных успешно заполнена!")
         print("\nДанные для входа:")
         for user_data in users_data:
@@ -0,0 +1,32 @@
+"""Production launcher: uvicorn without auto-reload
+
+Live streams, their event ids, read-your-writes stickiness and the word
+cache all live in process memory, so they are only correct with a single
+worker. Until that state is shared (e.g. Redis pub/sub), more than one
+worker needs ALLOW_PER_WORKER_STATE=1 as an explicit acknowledgement:
+  - SSE events only reach streams held by the worker that made the change,
+    and a Last-Event-ID from one worker means nothing to another
+  - after a write, a read served by another worker may hit a lagging replica
+  - other workers' word caches stay stale for up to WORD_CACHE_TTL_SECONDS
+"""
+import os
+import sys
+
+import uvicorn
+
+if __name__ == "__main__":
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1 and os.getenv("ALLOW_PER_WORKER_STATE") != "1":
+        sys.exit(
+            f"WEB_CONCURRENCY={workers}: live streams, replica stickiness and the word cache "
+            "are per process. Set ALLOW_PER_WORKER_STATE=1 to run several workers anyway."
+        )
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        # Railway provides PORT
+        port=int(os.getenv("PORT", os.getenv("API_PORT", "8000"))),
+        workers=workers,
+        # X-Forwarded-* is trusted only from FORWARDED_ALLOW_IPS (uvicorn's default: 127.0.0.1)
+        log_level=os.getenv("LOG_LEVEL", "info"),
+    )
@@ -0,0 +1,161 @@
+"""Route each user's words to one of several databases"""
+from bisect import bisect
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, Session
+import hashlib
+
+from replicas import ReplicaPool, WriteTracker
+
+# Points per shard on the hash ring; more points spread users more evenly
+VIRTUAL_NODES = 64
+
+
+def normalize_url(url: str) -> str:
+    # For Railway PostgreSQL compatibility
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, ON DELETE CASCADE included, unless asked per connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def make_engine(url: str, pre_ping: bool = False) -> Engine:
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+        pool_pre_ping=pre_ping
+    )
+    if url.startswith("sqlite"):
+        event.listen(engine, "connect", _enable_foreign_keys)
+    return engine
+
+
+def _split_named(item: str) -> Tuple[Optional[str], str]:
+    name, sep, url = item.partition("=")
+    # A bare URL's first "=" belongs to its query string, never to a name
+    if not sep or ":" in name or "/" in name:
+        return None, normalize_url(item)
+    return name.strip(), normalize_url(url.strip())
+
+
+def parse_shard_urls(value: str) -> Dict[str, str]:
+    """Parse "name=url,name=url" (or bare urls, named shard0, shard1, ...) into a dict"""
+    shards = {}
+    for index, item in enumerate(part.strip() for part in value.split(",")):
+        if not item:
+            continue
+        name, url = _split_named(item)
+        shards[name or f"shard{index}"] = url
+    return shards
+
+
+def parse_replica_urls(value: str) -> Dict[Optional[str], List[str]]:
+    """Parse "shard=url,shard=url" into replica lists per shard; bare urls go under None"""
+    replicas: Dict[Optional[str], List[str]] = {}
+    for item in (part.strip() for part in value.split(",")):
+        if item:
+            name, url = _split_named(item)
+            replicas.setdefault(name, []).append(url)
+    return replicas
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring: adding a shard only moves ~1/N of the keys"""
+
+    def __init__(self, names: List[str], vnodes: int = VIRTUAL_NODES):
+        if not names:
+            raise ValueError("HashRing needs at least one shard")
+        points: List[Tuple[int, str]] = sorted(
+            (_hash(f"{name}#{i}"), name) for name in names for i in range(vnodes)
+        )
+        self._keys = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def node_for(self, key: str) -> str:
+        index = bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._names[index]
+
+
+class ShardRouter:
+    """Engines and sessions for every shard plus the user directory database"""
+
+    def __init__(self, directory_url: str, shard_urls: Dict[str, str],
+                 replica_urls: Optional[Dict[Optional[str], List[str]]] = None, vnodes: int = VIRTUAL_NODES):
+        self.directory_url = normalize_url(directory_url)
+        self.shard_urls = dict(shard_urls) or {"default": self.directory_url}
+
+        # Shards pointing at the same database share one engine and pool
+        engines_by_url: Dict[str, Engine] = {self.directory_url: make_engine(self.directory_url)}
+        self.directory_engine = engines_by_url[self.directory_url]
+        self.engines: Dict[str, Engine] = {}
+        for name, url in self.shard_urls.items():
+            if url not in engines_by_url:
+                engines_by_url[url] = make_engine(url)
+            self.engines[name] = engines_by_url[url]
+
+        self.DirectorySession = sessionmaker(autocommit=False, autoflush=False, bind=self.directory_engine)
+        self._sessionmakers = {
+            name: sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            for name, engine in self.engines.items()
+        }
+        self.ring = HashRing(list(self.engines), vnodes)
+
+        # Replicas listed without a shard name belong to the first shard
+        self.replicas: Dict[str, ReplicaPool] = {}
+        for name, urls in (replica_urls or {}).items():
+            shard = name if name is not None else self.names[0]
+            if shard not in self.engines:
+                raise KeyError(f"Replicas configured for unknown shard {shard!r}")
+            pool = self.replicas.get(shard)
+            # Ping pooled connections on checkout: a replica restart or failover leaves dead
+            # connections in the pool, and they'd otherwise only fail mid-query with a 500
+            engines = (pool.engines if pool else []) + [make_engine(url, pre_ping=True) for url in urls]
+            self.replicas[shard] = ReplicaPool(engines)
+        self.writes = WriteTracker()
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.engines)
+
+    def shard_for(self, user_id: int, placement: Optional[str] = None) -> str:
+        """Shard holding a user's words: their recorded placement, else the hash ring"""
+        if placement is not None:
+            if placement not in self.engines:
+                raise KeyError(f"User {user_id} is placed on unknown shard {placement!r}")
+            return placement
+        return self.ring.node_for(str(user_id))
+
+    def session(self, shard: str) -> Session:
+        return self._sessionmakers[shard]()
+
+    def read_session(self, shard: str, user_id: Optional[int] = None) -> Session:
+        """Session for read-only work: a healthy replica unless the user just wrote"""
+        pool = self.replicas.get(shard)
+        if pool is None or self.writes.is_recent(user_id):
+            return self.session(shard)
+        for index in pool.candidates():
+            db = pool.session(index)
+            try:
+                # Check out a connection now so a dead replica falls back here, not mid-query
+                db.connection()
+                return db
+            except OperationalError:
+                db.close()
+                pool.mark_down(index)
+        return self.session(shard)
+
+    def unique_engines(self) -> List[Engine]:
+        """Each distinct shard engine once, even if several names share it"""
+        return list({id(engine): engine for engine in self.engines.values()}.values())
@@ -0,0 +1,120 @@
+import io
+import itertools
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+# DATABASE_URL and IMAGE_STORE_DIR are read when main.py is imported, so set them first
+_tmpdir = tempfile.mkdtemp(prefix="wilddict-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'wilddict.db')}"
+os.environ["IMAGE_STORE_DIR"] = os.path.join(_tmpdir, "images")
+os.environ["OPS_TOKEN"] = "test-ops-token"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+
+
+class QueryCounter:
+    """Collect every SQL statement executed on any of the app's engines"""
+
+    def __init__(self):
+        self.statements = []
+        self.active = False
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        self.active = True
+        return self
+
+    def __exit__(self, *exc):
+        self.active = False
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def query_counter(client):
+    counter = QueryCounter()
+    engines = {id(engine): engine for engine in [main.engine, *main.shard_router.unique_engines()]}
+    for engine in engines.values():
+        event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        for engine in engines.values():
+            event.remove(engine, "before_cursor_execute", counter)
+
+
+_user_numbers = itertools.count(1)
+
+# A word payload for tests that just need one to exist
+WORD = {
+    "word": "Hygge",
+    "definition": "A quality of coziness",
+    "example": "Candles and cocoa make hygge.",
+    "language": "Danish",
+    "source_language": "English",
+    "tags": ["noun"],
+}
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when a test moves it"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clocked_module():
+    """Module whose time.monotonic the clock fixture replaces; override per test file"""
+    raise NotImplementedError("Define a clocked_module fixture returning the module to patch")
+
+
+@pytest.fixture
+def clock(monkeypatch, clocked_module):
+    clock = Clock()
+    monkeypatch.setattr(clocked_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def make_png(color=(200, 120, 40), size=(400, 300)) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register a fresh user and return bearer headers for them"""
+    number = next(_user_numbers)
+    response = client.post("/api/auth/register", json={
+        "email": f"user{number}@example.com",
+        "username": f"user{number}",
+        "password": "password123",
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
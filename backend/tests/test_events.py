@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+
+import events
+import main
+from conftest import WORD
+from events import WordEventHub, event_stream, parse_event_id
+
+
+@pytest.fixture
+def clocked_module():
+    return events
+
+
+async def never_disconnected():
+    return False
+
+
+def frames(hub, subscription, last_event_id=None, count=1, heartbeat=5.0):
+    """The first count frames event_stream yields, after its retry frame"""
+    async def run():
+        stream = event_stream(hub, subscription, last_event_id, never_disconnected, heartbeat)
+        collected = []
+        try:
+            async for frame in stream:
+                collected.append(frame)
+                if len(collected) == count + 1:
+                    break
+        finally:
+            await stream.aclose()
+        assert collected[0].startswith("retry: ")
+        return collected[1:]
+
+    return asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+def test_event_ids_carry_the_log_epoch():
+    hub = WordEventHub()
+    event = hub.publish(1, "created", {"id": 10})
+
+    assert event.encode().startswith(f"id: {event.epoch}-1\n")
+    assert parse_event_id(hub.last_event_id(1)) == (event.epoch, 1)
+    assert parse_event_id("3") is None
+    assert parse_event_id("abc-x") is None
+
+
+def test_id_from_another_process_gets_a_reset():
+    # A restarted process numbers from 1 again; a bare sequence match must not skip events
+    before = WordEventHub()
+    for i in range(3):
+        before.publish(1, "created", {"id": i})
+    old_id = before.last_event_id(1)
+
+    after = WordEventHub()
+    for i in range(3):
+        after.publish(1, "created", {"id": i})
+
+    assert after.replay(1, old_id) is None
+    subscription = after.subscribe(1)
+    reset = frames(after, subscription, last_event_id=old_id)[0]
+    assert reset == f"id: {after.last_event_id(1)}\nevent: reset\ndata: {{}}\n\n"
+
+
+def test_idle_logs_without_subscribers_are_dropped(clock):
+    hub = WordEventHub(idle_seconds=60)
+    hub.publish(1, "created", {"id": 1})
+    hub.publish(2, "created", {"id": 2})
+    stale_id = hub.last_event_id(1)
+    subscription = hub.subscribe(2)
+
+    clock.now += 61
+    hub.publish(3, "created", {"id": 3})
+
+    assert sorted(hub._logs) == [2, 3]
+    # A client coming back later can't resume from the dropped log
+    hub.publish(1, "created", {"id": 4})
+    assert hub.replay(1, stale_id) is None
+    hub.unsubscribe(subscription)
+
+
+def test_recent_logs_are_kept(clock):
+    hub = WordEventHub(idle_seconds=60)
+    hub.publish(1, "created", {"id": 1})
+    clock.now += 30
+    hub.prune(force=True)
+    assert list(hub._logs) == [1]
+
+
+def test_replay_returns_events_after_the_given_id():
+    hub = WordEventHub(replay_size=5)
+    published = [hub.publish(1, "created", {"id": i}) for i in range(3)]
+    epoch = published[0].epoch
+
+    assert hub.replay(1, f"{epoch}-1") == published[1:]
+    assert hub.replay(1, f"{epoch}-3") == []
+    assert hub.replay(1, f"{epoch}-9") is None
+
+
+def test_reset_when_missed_events_fell_out_of_the_buffer():
+    hub = WordEventHub(replay_size=2)
+    epoch = hub.publish(1, "created", {"id": 0}).epoch
+    for i in range(1, 5):
+        hub.publish(1, "created", {"id": i})
+
+    # Events 2 and 3 are gone, only 4 and 5 are buffered
+    assert hub.replay(1, f"{epoch}-1") is None
+    assert [event.id for event in hub.replay(1, f"{epoch}-3")] == [4, 5]
+
+    subscription = hub.subscribe(1)
+    assert frames(hub, subscription, last_event_id=f"{epoch}-1")[0].startswith(f"id: {epoch}-5\nevent: reset\n")
+
+
+def test_stream_replays_backlog_then_skips_its_queued_copies():
+    hub = WordEventHub()
+    subscription = hub.subscribe(1)
+    first = hub.publish(1, "created", {"id": 1})
+    hub.publish(1, "updated", {"id": 1})
+    # Both events are queued for the subscription and also in the replay buffer
+
+    async def run():
+        stream = event_stream(hub, subscription, f"{first.epoch}-0", never_disconnected, 5.0)
+        try:
+            sent = [await stream.__anext__() for _ in range(3)]
+            hub.publish(1, "deleted", {"id": 1})
+            sent.append(await stream.__anext__())
+        finally:
+            await stream.aclose()
+        return sent
+
+    sent = asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert [frame.split("\n")[1] for frame in sent[1:]] == ["event: created", "event: updated", "event: deleted"]
+    assert sent[3].startswith(f"id: {first.epoch}-3\n")
+
+
+def test_idle_stream_sends_keep_alives():
+    hub = WordEventHub()
+    subscription = hub.subscribe(1)
+    assert frames(hub, subscription, count=2, heartbeat=0.01) == [": keep-alive\n\n"] * 2
+
+
+def test_slow_consumer_is_dropped_and_its_stream_ends():
+    hub = WordEventHub(queue_size=2)
+    subscription = hub.subscribe(1)
+    other = hub.subscribe(1)  # Keeps up by draining its queue
+    for i in range(3):
+        hub.publish(1, "created", {"id": i})
+        if not other.queue.empty():
+            other.queue.get_nowait()
+
+    assert subscription.dropped
+    assert not other.dropped
+    assert hub.subscriber_count(1) == 1
+
+    async def run():
+        return [frame async for frame in event_stream(hub, subscription, None, never_disconnected, 5.0)]
+
+    assert len(asyncio.run(asyncio.wait_for(run(), timeout=5))) == 1  # Just the retry frame
+
+
+def test_word_changes_reach_open_subscriptions(client, auth_headers):
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    subscription = main.hub.subscribe(user_id)
+    try:
+        created = client.post("/api/words", json=WORD, headers=auth_headers).json()
+        patched = client.patch(f"/api/words/{created['id']}", json={"example": "Cozy."}, headers=auth_headers).json()
+        client.delete(f"/api/words/{created['id']}", headers=auth_headers)
+        received = [subscription.queue.get_nowait() for _ in range(3)]
+    finally:
+        main.hub.unsubscribe(subscription)
+
+    assert [(event.type, event.data) for event in received] == [
+        ("created", created), ("updated", patched), ("deleted", {"id": created["id"]}),
+    ]
+    assert [event.id for event in received] == [received[0].id, received[0].id + 1, received[0].id + 2]
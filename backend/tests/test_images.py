@@ -0,0 +1,153 @@
+import io
+import os
+
+import main
+from conftest import WORD, make_png
+
+
+def upload(client, headers, data, content_type="image/png"):
+    word_id = client.post("/api/words", json=WORD, headers=headers).json()["id"]
+    return client.put(f"/api/words/{word_id}/image", files={"file": ("img", data, content_type)}, headers=headers)
+
+
+def test_identical_images_are_stored_once(client, auth_headers):
+    other_user = client.post("/api/auth/register", json={
+        "email": "images@example.com", "username": "images", "password": "password123",
+    }).json()["access_token"]
+    data = make_png(color=(1, 2, 3))
+
+    first = upload(client, auth_headers, data).json()
+    second = upload(client, {"Authorization": f"Bearer {other_user}"}, data).json()
+
+    assert first["image_url"] == second["image_url"]
+    filename = first["image_url"].rsplit("/", 1)[1]
+    store_dir = os.path.dirname(main.image_store.path(filename))
+    assert sorted(os.listdir(store_dir)) == sorted([filename, filename.split(".")[0] + ".thumb.jpg"])
+
+
+def test_image_is_listed_and_served_with_cache_headers(client, auth_headers):
+    word = upload(client, auth_headers, make_png(color=(9, 9, 9))).json()
+    listed = client.get("/api/words", headers=auth_headers).json()
+    assert [w["image_url"] for w in listed] == [word["image_url"]]
+    patched = client.patch(f"/api/words/{word['id']}", json={"example": "Cozy."}, headers=auth_headers)
+    assert patched.json()["image_url"] == word["image_url"]
+
+    response = client.get(word["image_url"])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert "immutable" in response.headers["cache-control"]
+
+    etag = response.headers["etag"]
+    assert client.get(word["image_url"], headers={"If-None-Match": etag}).status_code == 304
+
+    partial = client.get(word["image_url"], headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.content == response.content[:10]
+
+    thumb = client.get(word["thumbnail_url"])
+    assert thumb.status_code == 200 and thumb.headers["content-type"] == "image/jpeg"
+
+
+def test_rejects_non_images(client, auth_headers):
+    assert upload(client, auth_headers, b"hello", content_type="text/plain").status_code == 415
+    assert upload(client, auth_headers, b"not really a png").status_code == 400
+    assert client.get("/api/images/../main.py").status_code == 404
+
+
+def test_deleting_a_word_drops_its_image_link(client, auth_headers, query_counter):
+    word = upload(client, auth_headers, make_png(color=(4, 5, 6))).json()
+
+    with query_counter:
+        assert client.delete(f"/api/words/{word['id']}", headers=auth_headers).status_code == 200
+    assert [s.split()[0] for s in query_counter.statements] == ["SELECT", "DELETE"]
+
+    db = main.shard_router.session(main.shard_router.names[0])
+    try:
+        assert db.query(main.WordImageDB).filter(main.WordImageDB.word_id == word["id"]).count() == 0
+    finally:
+        db.close()
+    # The file stays: other words may share it
+    assert main.image_store.resolve(word["image_url"].rsplit("/", 1)[1])
+
+
+def test_extension_comes_from_the_image_not_the_client(client, auth_headers):
+    word = upload(client, auth_headers, make_png(color=(7, 8, 9)), content_type="image/gif").json()
+
+    assert word["image_url"].endswith(".png")
+    assert client.get(word["image_url"]).headers["content-type"] == "image/png"
+
+
+def test_rejects_unsupported_formats_named_as_supported(client, auth_headers):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buffer, "BMP")
+    assert upload(client, auth_headers, buffer.getvalue()).status_code == 415
+
+
+def test_deleting_an_image_publishes_the_updated_word(client, auth_headers):
+    word = upload(client, auth_headers, make_png(color=(10, 11, 12))).json()
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    subscription = main.hub.subscribe(user_id)
+    try:
+        assert client.delete(f"/api/words/{word['id']}/image", headers=auth_headers).status_code == 200
+        event = subscription.queue.get_nowait()
+    finally:
+        main.hub.unsubscribe(subscription)
+
+    assert event.type == "updated"
+    assert event.data == {**word, "image_url": None, "thumbnail_url": None}
+
+
+def huge_png(size) -> bytes:
+    """A 1-bit PNG: a few KB on disk, width x height pixels once decoded"""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("1", size).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_rejects_images_with_too_many_pixels(client, auth_headers):
+    data = huge_png((8000, 8000))
+    assert len(data) < 100_000
+
+    response = upload(client, auth_headers, data)
+
+    assert response.status_code == 413
+    assert "pixels" in response.json()["detail"]
+
+
+def test_decompression_bombs_are_rejected_not_crashing(client, auth_headers, monkeypatch):
+    from PIL import Image
+
+    # Pillow refuses to open anything over twice its limit before our own check runs
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1_000_000)
+    monkeypatch.setattr(main.image_store, "max_pixels", 10 ** 9)
+
+    assert upload(client, auth_headers, huge_png((3000, 3000))).status_code == 413
+
+
+def test_jpeg_thumbnail_is_scaled_down(client, auth_headers):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (3000, 2000), (30, 60, 90)).save(buffer, "JPEG")
+    word = upload(client, auth_headers, buffer.getvalue(), content_type="image/jpeg").json()
+
+    thumbnail = client.get(word["thumbnail_url"])
+    assert Image.open(io.BytesIO(thumbnail.content)).size == (256, 171)
+
+
+def test_oversized_uploads_are_refused_before_the_body_is_read(client, auth_headers):
+    word_id = client.post("/api/words", json=WORD, headers=auth_headers).json()["id"]
+    url = f"/api/words/{word_id}/image"
+    headers = {**auth_headers, "Content-Type": "multipart/form-data; boundary=x"}
+
+    too_big = client.put(url, headers={**headers, "Content-Length": str(50 * 1024 * 1024)}, content=b"")
+    assert too_big.status_code == 413
+
+    def chunks():
+        yield b"--x\r\n"
+
+    assert client.put(url, headers=headers, content=chunks()).status_code == 411
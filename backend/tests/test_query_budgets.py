@@ -0,0 +1,94 @@
+"""Every route has a budget of SQL statements per request; exceeding it fails with the SQL"""
+import pytest
+from fastapi.routing import APIRoute
+
+import main
+from conftest import WORD, make_png
+
+# (method, path) -> maximum statements per request, including the get_current_user lookup
+QUERY_BUDGETS = {
+    ("GET", "/"): 0,
+    ("POST", "/api/auth/register"): 3,
+    ("POST", "/api/auth/login"): 1,
+    ("GET", "/api/auth/me"): 1,
+    ("GET", "/api/words"): 2,
+    ("GET", "/api/words/stream"): 1,
+    ("POST", "/api/words/stream/ticket"): 1,
+    ("GET", "/api/words/{word_id}"): 2,
+    ("POST", "/api/words"): 3,
+    ("PUT", "/api/words/{word_id}"): 2,
+    ("PATCH", "/api/words/{word_id}"): 2,
+    ("DELETE", "/api/words/{word_id}"): 2,
+    ("PUT", "/api/words/{word_id}/image"): 4,
+    # Delete the link, then read the word back for the SSE "updated" event
+    ("DELETE", "/api/words/{word_id}/image"): 3,
+    ("GET", "/api/images/{filename}"): 0,
+    ("GET", "/api/stats"): 2,
+    ("GET", "/api/cache/stats"): 0,
+    ("POST", "/api/seed-demo-data"): 3,
+}
+
+# TestClient buffers the whole body, so an endless SSE stream can't be exercised here
+NOT_EXERCISED = {("GET", "/api/words/stream")}
+
+
+def app_routes():
+    for route in main.app.routes:
+        if isinstance(route, APIRoute) and route.include_in_schema:
+            for method in route.methods:
+                yield method, route.path
+
+
+def test_every_route_declares_a_budget():
+    missing = sorted(set(app_routes()) - set(QUERY_BUDGETS))
+    assert not missing, f"Add a query budget for: {missing}"
+
+
+def _request(client, headers, method, path):
+    """Issue a representative request for a route, creating whatever it needs first"""
+    word_id = None
+    if "{word_id}" in path:
+        created = client.post("/api/words", json=WORD, headers=headers)
+        word_id = created.json()["id"]
+    elif path in ("/api/words", "/api/stats") and method == "GET":
+        client.post("/api/seed-demo-data", headers=headers)
+
+    url = path.replace("{word_id}", str(word_id))
+    if path.endswith("/image"):
+        if method == "DELETE":
+            client.put(url, files={"file": ("a.png", make_png(), "image/png")}, headers=headers)
+            return lambda: client.delete(url, headers=headers)
+        return lambda: client.put(url, files={"file": ("a.png", make_png(), "image/png")}, headers=headers)
+    if path == "/api/images/{filename}":
+        word_id = client.post("/api/words", json=WORD, headers=headers).json()["id"]
+        uploaded = client.put(f"/api/words/{word_id}/image", files={"file": ("a.png", make_png(), "image/png")}, headers=headers)
+        return lambda: client.get(uploaded.json()["image_url"])
+
+    if path == "/api/cache/stats":
+        return lambda: client.get(url, headers={"X-Ops-Token": main.OPS_TOKEN})
+
+    body = None
+    if path == "/api/auth/register":
+        body = {"email": "budget@example.com", "username": "budget", "password": "password123"}
+    elif path == "/api/auth/login":
+        client.post("/api/auth/register", json={"email": "login@example.com", "username": "login", "password": "password123"})
+        body = {"email": "login@example.com", "password": "password123"}
+    elif method in ("POST", "PUT") and path.startswith("/api/words"):
+        body = WORD
+    elif method == "PATCH":
+        body = {"definition": "Light filtering through leaves"}
+    return lambda: client.request(method, url, json=body, headers=headers)
+
+
+@pytest.mark.parametrize("method,path", sorted(set(QUERY_BUDGETS) - NOT_EXERCISED))
+def test_query_budget(client, auth_headers, query_counter, method, path):
+    send = _request(client, auth_headers, method, path)
+    with query_counter:
+        response = send()
+
+    assert response.status_code < 400, response.text
+    budget = QUERY_BUDGETS[(method, path)]
+    statements = "\n\n".join(query_counter.statements)
+    assert query_counter.count <= budget, (
+        f"{method} {path} ran {query_counter.count} SQL statements, budget is {budget}:\n\n{statements}"
+    )
@@ -0,0 +1,105 @@
+import pytest
+
+import replicas
+from replicas import ReplicaPool, WriteTracker
+from sharding import ShardRouter, make_engine
+
+
+@pytest.fixture
+def clocked_module():
+    return replicas
+
+
+def make_pool(size, retry_seconds=30):
+    return ReplicaPool([make_engine("sqlite://") for _ in range(size)], retry_seconds)
+
+
+def test_write_tracker_is_sticky_for_the_window(clock):
+    writes = WriteTracker(window=5)
+    assert not writes.is_recent(1)
+    assert not writes.is_recent(None)
+
+    writes.mark(1)
+    clock.now += 4.9
+    assert writes.is_recent(1)
+    assert not writes.is_recent(2)
+
+    clock.now += 0.2
+    assert not writes.is_recent(1)
+
+
+def test_write_tracker_forgets_expired_users(clock):
+    writes = WriteTracker(window=5)
+    for user_id in range(1025):
+        writes.mark(user_id)
+    clock.now += 10
+    writes.mark(5000)
+
+    assert list(writes._last_write) == [5000]
+
+
+def test_candidates_rotate_round_robin(clock):
+    pool = make_pool(3)
+    assert [pool.candidates()[0] for _ in range(6)] == [0, 1, 2, 0, 1, 2]
+    assert pool.candidates() == [0, 1, 2]
+    assert pool.candidates() == [1, 2, 0]
+
+
+def test_mark_down_skips_replica_until_retry(clock):
+    pool = make_pool(3, retry_seconds=30)
+    pool.mark_down(1)
+
+    assert all(1 not in pool.candidates() for _ in range(3))
+    assert pool.healthy_count() == 2
+
+    clock.now += 29
+    assert 1 not in pool.candidates()
+    clock.now += 2
+    assert 1 in pool.candidates()
+    assert pool.healthy_count() == 3
+
+
+def test_replica_engines_ping_pooled_connections(tmp_path):
+    router = ShardRouter(
+        f"sqlite:///{tmp_path / 'primary.db'}", {},
+        {None: [f"sqlite:///{tmp_path / 'replica.db'}"]},
+    )
+    assert router.replicas["default"].engines[0].pool._pre_ping
+    assert not router.engines["default"].pool._pre_ping
+
+
+def test_read_session_falls_back_to_primary_when_replica_is_down(tmp_path, clock):
+    primary_url = f"sqlite:///{tmp_path / 'primary.db'}"
+    router = ShardRouter(primary_url, {}, {None: [f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"]})
+    pool = router.replicas["default"]
+
+    db = router.read_session("default", user_id=1)
+    try:
+        assert str(db.get_bind().url) == primary_url
+    finally:
+        db.close()
+    assert pool.healthy_count() == 0
+
+    # Once the replica answers again it is retried after the down window
+    (tmp_path / "missing").mkdir()
+    clock.now += pool.retry_seconds + 1
+    db = router.read_session("default", user_id=1)
+    try:
+        assert db.get_bind() is pool.engines[0]
+    finally:
+        db.close()
+
+
+def test_recent_writer_reads_from_primary(tmp_path, clock):
+    router = ShardRouter(
+        f"sqlite:///{tmp_path / 'primary.db'}", {},
+        {None: [f"sqlite:///{tmp_path / 'replica.db'}"]},
+    )
+    router.writes.mark(7)
+
+    for user_id, engine in ((7, router.engines["default"]), (8, router.replicas["default"].engines[0])):
+        db = router.read_session("default", user_id=user_id)
+        try:
+            assert db.get_bind() is engine
+        finally:
+            db.close()
@@ -0,0 +1,150 @@
+import pytest
+
+import main
+import rebalance_shards
+from main import Base, UserShardDB, WordDB, WordImageDB, DIRECTORY_TABLES, SHARD_TABLES
+from conftest import WORD
+from sharding import HashRing, ShardRouter, _split_named, parse_replica_urls, parse_shard_urls
+
+
+def test_hash_ring_is_deterministic_and_uses_every_shard():
+    ring = HashRing(["a", "b", "c"])
+    placements = [ring.node_for(str(key)) for key in range(3000)]
+
+    assert placements == [HashRing(["a", "b", "c"]).node_for(str(key)) for key in range(3000)]
+    assert all(placements.count(name) > 600 for name in "abc")
+
+
+def test_adding_a_shard_only_moves_keys_onto_it():
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+    moved = [key for key in range(3000) if before.node_for(str(key)) != after.node_for(str(key))]
+
+    assert all(after.node_for(str(key)) == "d" for key in moved)
+    assert 0.1 < len(moved) / 3000 < 0.4
+
+
+def test_hash_ring_needs_a_shard():
+    with pytest.raises(ValueError):
+        HashRing([])
+
+
+@pytest.mark.parametrize("item, expected", [
+    ("s0=sqlite:///./s0.db", ("s0", "sqlite:///./s0.db")),
+    (" s1 = postgres://u:p@host/db ", ("s1", "postgresql://u:p@host/db")),
+    ("s2=postgresql://u:p@host/db?sslmode=require", ("s2", "postgresql://u:p@host/db?sslmode=require")),
+    ("postgresql://u:p@host/db?sslmode=require", (None, "postgresql://u:p@host/db?sslmode=require")),
+    ("sqlite:///./plain.db", (None, "sqlite:///./plain.db")),
+])
+def test_split_named(item, expected):
+    assert _split_named(item) == expected
+
+
+def test_parse_shard_urls_names_bare_urls_by_position():
+    assert parse_shard_urls("sqlite:///./a.db, ,postgresql://h/db?sslmode=require") == {
+        "shard0": "sqlite:///./a.db",
+        "shard2": "postgresql://h/db?sslmode=require",
+    }
+    assert parse_shard_urls("") == {}
+
+
+def test_parse_replica_urls_groups_by_shard():
+    assert parse_replica_urls("s0=sqlite:///./r1.db,sqlite:///./r2.db,s0=sqlite:///./r3.db") == {
+        "s0": ["sqlite:///./r1.db", "sqlite:///./r3.db"],
+        None: ["sqlite:///./r2.db"],
+    }
+
+
+@pytest.fixture
+def sharded(client, tmp_path, monkeypatch):
+    """Point the app at a fresh directory database and two word shards"""
+    router = ShardRouter(
+        f"sqlite:///{tmp_path / 'directory.db'}",
+        {name: f"sqlite:///{tmp_path / name}.db" for name in ("s0", "s1")},
+    )
+    Base.metadata.create_all(bind=router.directory_engine, tables=DIRECTORY_TABLES)
+    for engine in router.unique_engines():
+        Base.metadata.create_all(bind=engine, tables=SHARD_TABLES)
+    monkeypatch.setattr(main, "shard_router", router)
+    monkeypatch.setattr(main, "engine", router.directory_engine)
+    monkeypatch.setattr(main, "SessionLocal", router.DirectorySession)
+    yield router
+    for engine in [router.directory_engine, *router.unique_engines()]:
+        engine.dispose()
+
+
+def register(client, name):
+    response = client.post("/api/auth/register", json={
+        "email": f"{name}@example.com", "username": name, "password": "password123",
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def placement(router, user_id):
+    directory = router.DirectorySession()
+    try:
+        return directory.query(UserShardDB.shard).filter(UserShardDB.user_id == user_id).scalar()
+    finally:
+        directory.close()
+
+
+def words_on(router, shard, user_id):
+    db = router.session(shard)
+    try:
+        return [word for (word,) in db.query(WordDB.word).filter(WordDB.user_id == user_id).order_by(WordDB.id)]
+    finally:
+        db.close()
+
+
+def test_registration_pins_user_and_routes_words_to_their_shard(client, sharded):
+    headers = register(client, "pinned")
+    user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+
+    shard = placement(sharded, user_id)
+    assert shard == sharded.ring.node_for(str(user_id))
+
+    assert client.post("/api/words", json=WORD, headers=headers).status_code == 200
+    other = "s1" if shard == "s0" else "s0"
+    assert words_on(sharded, shard, user_id) == ["Hygge"]
+    assert words_on(sharded, other, user_id) == []
+
+
+def test_recorded_placement_wins_over_the_ring(client, sharded):
+    headers = register(client, "repinned")
+    user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+    other = "s1" if placement(sharded, user_id) == "s0" else "s0"
+
+    directory = sharded.DirectorySession()
+    directory.merge(UserShardDB(user_id=user_id, shard=other))
+    directory.commit()
+    directory.close()
+
+    client.post("/api/words", json=WORD, headers=headers)
+    assert words_on(sharded, other, user_id) == ["Hygge"]
+
+
+def test_move_user_copies_words_and_image_links(client, sharded):
+    headers = register(client, "mover")
+    user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+    source = placement(sharded, user_id)
+    target = "s1" if source == "s0" else "s0"
+    word_ids = [
+        client.post("/api/words", json={**WORD, "word": word}, headers=headers).json()["id"]
+        for word in ("Hygge", "Lagom")
+    ]
+    filename = "ab" * 32 + ".png"
+    db = sharded.session(source)
+    db.add(WordImageDB(word_id=word_ids[1], user_id=user_id, filename=filename))
+    db.commit()
+    db.close()
+
+    rebalance_shards.move_user(user_id, target)
+
+    assert placement(sharded, user_id) == target
+    assert words_on(sharded, source, user_id) == []
+    assert words_on(sharded, target, user_id) == ["Hygge", "Lagom"]
+    words = client.get("/api/words", headers=headers).json()
+    assert [word["word"] for word in words] == ["Hygge", "Lagom"]
+    assert words[0]["image_url"] is None
+    assert words[1]["image_url"] == f"/api/images/{filename}"
@@ -0,0 +1,49 @@
+"""Importing the app runs on every cold start, so it must stay fast and touch no database"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+
+
+def slowest_imports(importtime_log: str, count: int = 10):
+    """Modules with the highest self time from python -X importtime output"""
+    rows = []
+    for line in importtime_log.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[0].startswith("import time:") and parts[0].split(":")[1].strip().isdigit():
+            rows.append((int(parts[0].split(":")[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def test_import_is_fast_and_side_effect_free(tmp_path, record_property):
+    database = tmp_path / "cold-start.db"
+    images = tmp_path / "images"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}", IMAGE_STORE_DIR=str(images))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", MEASURE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+    seconds = float(result.stdout.strip().splitlines()[-1])
+    record_property("import_seconds", round(seconds, 3))
+    report = "\n".join(f"{us / 1000:8.1f} ms  {module}" for us, module in slowest_imports(result.stderr))
+
+    assert not database.exists(), "Importing main must not connect to the database"
+    assert not images.exists(), "Importing main must not touch the image store"
+    assert seconds <= IMPORT_BUDGET_SECONDS, (
+        f"import main took {seconds:.2f}s, budget is {IMPORT_BUDGET_SECONDS}s. Slowest modules:\n{report}"
+    )
+
+
+@pytest.mark.parametrize("mode", ["Check", "none", ""])
+def test_unknown_schema_mode_fails_startup(client, mode):
+    with pytest.raises(ValueError, match="SCHEMA_MODE"):
+        main.init_db(schema_mode=mode)
@@ -0,0 +1,79 @@
+import asyncio
+
+import main
+
+
+def open_stream(query_string: bytes = b"", headers=()):
+    """Start the SSE endpoint as a raw ASGI call and stop once the response has begun"""
+    async def run():
+        started = asyncio.Event()
+        messages = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+            if message["type"] == "http.response.body" and message.get("body"):
+                started.set()
+            if message["type"] == "http.response.start" and message["status"] != 200:
+                started.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/api/words/stream", "raw_path": b"/api/words/stream",
+            "query_string": query_string, "root_path": "", "headers": list(headers),
+            "client": ("test", 1), "server": ("test", 80),
+        }
+        task = asyncio.create_task(main.app(scope, receive, send))
+        await asyncio.wait_for(started.wait(), timeout=5)
+        # Streaming has begun: no pooled connection may still be checked out
+        checked_out = main.engine.pool.checkedout()
+        disconnect.set()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return messages[0]["status"], checked_out
+
+    return asyncio.run(run())
+
+
+def test_open_stream_holds_no_database_connection(client, auth_headers):
+    token = auth_headers["Authorization"].split()[1]
+    status, checked_out = open_stream(headers=[(b"authorization", f"Bearer {token}".encode())])
+    assert status == 200
+    assert checked_out == 0
+
+
+def ticket_for(client, headers):
+    response = client.post("/api/words/stream/ticket", headers=headers)
+    assert response.status_code == 200
+    return response.json()["ticket"]
+
+
+def test_stream_accepts_a_ticket_for_event_source(client, auth_headers):
+    ticket = ticket_for(client, auth_headers)
+    assert open_stream(query_string=f"ticket={ticket}".encode())[0] == 200
+    assert open_stream(query_string=b"ticket=garbage")[0] == 401
+    assert open_stream()[0] == 401
+
+
+def test_access_tokens_and_tickets_are_not_interchangeable(client, auth_headers):
+    token = auth_headers["Authorization"].split()[1]
+    # The long-lived token must never end up in a URL
+    assert open_stream(query_string=f"ticket={token}".encode())[0] == 401
+    assert open_stream(query_string=f"token={token}".encode())[0] == 401
+
+    ticket = ticket_for(client, auth_headers)
+    assert client.get("/api/words", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
+    assert client.post("/api/words/stream/ticket", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
+
+
+def test_expired_ticket_is_rejected(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_TICKET_SECONDS", -1)
+    ticket = ticket_for(client, auth_headers)
+    assert open_stream(query_string=f"ticket={ticket}".encode())[0] == 401
@@ -0,0 +1,161 @@
+from datetime import datetime
+
+import pytest
+
+import main
+import word_cache
+from word_cache import WordSetCache, make_row, page
+
+CREATED = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def clocked_module():
+    return word_cache
+
+
+def rows(count, language="English", start=1):
+    return [
+        make_row(i, f"word{i}", "definition " * 5, "example " * 5, language, "Russian", "noun,travel", CREATED)
+        for i in range(start, start + count)
+    ]
+
+
+def set_size(count):
+    """Bytes one word set of this shape takes in the cache"""
+    probe = WordSetCache(max_bytes=10 ** 9)
+    probe.put(1, rows(count))
+    return probe.bytes
+
+
+def test_make_row_interns_shared_strings():
+    first, second = rows(2)
+    assert first.language is second.language
+    assert first.tags == ("noun", "travel")
+    assert first.tags[0] is second.tags[0]
+
+
+def test_evicts_least_recently_used_by_bytes(clock):
+    size = set_size(10)
+    cache = WordSetCache(max_bytes=size * 2, ttl=60)
+    cache.put(1, rows(10))
+    cache.put(2, rows(10))
+    assert cache.get(1) is not None  # 1 is now more recent than 2
+
+    cache.put(3, rows(10))
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+    assert cache.bytes == size * 2 <= cache.max_bytes
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = WordSetCache(max_bytes=10 ** 6, ttl=60)
+    cache.put(1, rows(3))
+
+    clock.now += 59
+    assert cache.get(1) is not None
+    clock.now += 2
+    assert cache.get(1) is None
+    assert cache.bytes == 0
+    assert cache.stats()["entries"] == 0
+
+
+def test_oversized_word_set_bypasses_cache_until_ttl_or_write(clock):
+    cache = WordSetCache(max_bytes=set_size(10), ttl=60)
+    cache.put(1, rows(5))
+    cache.put(2, rows(50))
+
+    # The big set is not stored and evicts nobody
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert not cache.should_load(2)
+    assert cache.should_load(3)
+
+    clock.now += 61
+    assert cache.should_load(2)
+
+    cache.put(2, rows(50))
+    cache.invalidate(2)
+    assert cache.should_load(2)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = WordSetCache(max_bytes=0)
+    cache.put(1, rows(3))
+    assert not cache.should_load(1)
+    assert cache.get(1) is None
+
+
+def test_page_filters_then_slices():
+    words = tuple(rows(3, "English") + rows(3, "German", start=4) + rows(2, "English", start=7))
+
+    assert [row.id for row in page(words, 1, 2, "English")] == [2, 3]
+    assert [row.id for row in page(words, 3, 10, "English")] == [7, 8]
+    assert [row.id for row in page(words, 0, -1, "German")] == [4, 5, 6]
+    assert [row.id for row in page(words, -5, 2)] == [1, 2]
+    assert page(words, 0, 5, "French") == []
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"skip": 2, "limit": 3},
+    {"language": "English"},
+    {"language": "English", "skip": 1, "limit": 1},
+    {"skip": 100},
+    {"limit": -1},
+])
+def test_cached_pages_match_the_database(client, auth_headers, monkeypatch, params):
+    client.post("/api/seed-demo-data", headers=auth_headers)
+    from_db = client.get("/api/words", params=params, headers=auth_headers)
+
+    cache = WordSetCache(max_bytes=10 ** 7)
+    monkeypatch.setattr(main, "word_cache", cache)
+    client.get("/api/words", headers=auth_headers)
+    from_cache = client.get("/api/words", params=params, headers=auth_headers)
+
+    assert cache.hits == 1
+    assert from_cache.json() == from_db.json()
+    if params.get("language"):
+        assert {word["language"] for word in from_db.json()} == {params["language"]}
+
+
+def test_cache_stats_need_the_ops_token(client, auth_headers, monkeypatch):
+    assert client.get("/api/cache/stats", headers=auth_headers).status_code == 403
+    assert client.get("/api/cache/stats", headers={"X-Ops-Token": "wrong"}).status_code == 403
+    response = client.get("/api/cache/stats", headers={"X-Ops-Token": main.OPS_TOKEN})
+    assert response.status_code == 200
+    assert "hit_ratio" in response.json()
+
+    monkeypatch.setattr(main, "OPS_TOKEN", "")
+    assert client.get("/api/cache/stats", headers={"X-Ops-Token": ""}).status_code == 404
+
+
+def test_peeks_and_oversized_users_leave_the_hit_ratio_alone(clock):
+    cache = WordSetCache(max_bytes=set_size(10), ttl=60)
+    cache.put(1, rows(5))
+    cache.put(2, rows(50))
+
+    assert cache.get(1, record=False) is not None
+    assert cache.get(3, record=False) is None
+    assert cache.get(2) is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    clock.now += 61
+    assert cache.get(2) is None
+    assert cache.misses == 1
+
+
+def test_stats_requests_dont_count_as_cache_lookups(client, auth_headers, monkeypatch):
+    cache = WordSetCache(max_bytes=10 ** 7)
+    monkeypatch.setattr(main, "word_cache", cache)
+    client.post("/api/seed-demo-data", headers=auth_headers)
+
+    client.get("/api/stats", headers=auth_headers)
+    client.get("/api/words", headers=auth_headers)
+    stats = client.get("/api/stats", headers=auth_headers).json()
+
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert stats["total_words"] == len(client.get("/api/words", headers=auth_headers).json())
+    assert (cache.hits, cache.misses) == (1, 1)
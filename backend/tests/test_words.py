@@ -0,0 +1,32 @@
+from conftest import WORD
+
+
+def test_patch_changes_only_given_fields(client, auth_headers):
+    word_id = client.post("/api/words", json=WORD, headers=auth_headers).json()["id"]
+
+    response = client.patch(f"/api/words/{word_id}", json={"tags": ["noun", "lifestyle"]}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["tags"] == ["noun", "lifestyle"]
+    assert response.json()["definition"] == WORD["definition"]
+    assert client.get(f"/api/words/{word_id}", headers=auth_headers).json() == response.json()
+
+
+def test_patch_and_delete_only_touch_own_words(client, auth_headers):
+    other = client.post("/api/auth/register", json={
+        "email": "other@example.com", "username": "other", "password": "password123",
+    }).json()["access_token"]
+    other_headers = {"Authorization": f"Bearer {other}"}
+    word_id = client.post("/api/words", json=WORD, headers=auth_headers).json()["id"]
+
+    assert client.patch(f"/api/words/{word_id}", json={"word": "Mine"}, headers=other_headers).status_code == 404
+    assert client.delete(f"/api/words/{word_id}", headers=other_headers).status_code == 404
+    assert client.get(f"/api/words/{word_id}", headers=auth_headers).json()["word"] == WORD["word"]
+
+    assert client.delete(f"/api/words/{word_id}", headers=auth_headers).status_code == 200
+    assert client.delete(f"/api/words/{word_id}", headers=auth_headers).status_code == 404
+
+
+def test_patch_needs_at_least_one_field(client, auth_headers):
+    word_id = client.post("/api/words", json=WORD, headers=auth_headers).json()["id"]
+    assert client.patch(f"/api/words/{word_id}", json={}, headers=auth_headers).status_code == 400
@@ -0,0 +1,153 @@
+"""In-process cache of each active user's words, stored as compact tuple rows"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import os
+import sys
+import time
+
+# Total bytes the cache may hold; 0 disables it
+CACHE_BYTES = int(os.getenv("WORD_CACHE_BYTES", "0"))
+# Entries older than this are reloaded, so caches in other workers can't stay stale for long
+CACHE_TTL_SECONDS = float(os.getenv("WORD_CACHE_TTL_SECONDS", "60"))
+
+
+class WordRow(NamedTuple):
+    """One word as a plain tuple; language and tag strings are interned and shared"""
+    id: int
+    word: str
+    definition: str
+    example: str
+    language: str
+    source_language: str
+    tags: Tuple[str, ...]
+    created_at: datetime
+    image: Optional[str] = None
+
+
+def make_row(id: int, word: str, definition: str, example: str, language: str,
+             source_language: str, tags: Optional[str], created_at: datetime,
+             image: Optional[str] = None) -> WordRow:
+    """Build a row from database values (tags as the stored comma-separated string)"""
+    return WordRow(
+        id, word, definition, example,
+        sys.intern(language or ""),
+        sys.intern(source_language or ""),
+        tuple(sys.intern(tag) for tag in tags.split(",")) if tags else (),
+        created_at,
+        image
+    )
+
+
+def _row_size(row: WordRow) -> int:
+    # Interned strings are shared between rows, so only the per-row objects count
+    return (
+        sys.getsizeof(row)
+        + sys.getsizeof(row.id)
+        + sys.getsizeof(row.word)
+        + sys.getsizeof(row.definition)
+        + sys.getsizeof(row.example)
+        + sys.getsizeof(row.tags)
+        + sys.getsizeof(row.created_at)
+        + (sys.getsizeof(row.image) if row.image else 0)
+    )
+
+
+class _Entry:
+    __slots__ = ("rows", "size", "loaded_at")
+
+    def __init__(self, rows: Tuple[WordRow, ...], size: int):
+        self.rows = rows
+        self.size = size
+        self.loaded_at = time.monotonic()
+
+
+class WordSetCache:
+    """Per-user word sets bounded by total size, evicting the least recently used"""
+
+    def __init__(self, max_bytes: int = CACHE_BYTES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        # Users whose word set didn't fit, so they're served straight from the database
+        self._oversized: Dict[int, float] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _bypassed(self, user_id: int) -> bool:
+        rejected_at = self._oversized.get(user_id)
+        return rejected_at is not None and time.monotonic() - rejected_at <= self.ttl
+
+    def should_load(self, user_id: int) -> bool:
+        """Whether a miss for this user is worth loading their whole word set"""
+        return self.enabled and not self._bypassed(user_id)
+
+    def get(self, user_id: int, record: bool = True) -> Optional[Tuple[WordRow, ...]]:
+        """Cached rows for a user; record=False peeks without touching hits, misses or LRU order"""
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry.loaded_at > self.ttl:
+            self.invalidate(user_id)
+            entry = None
+        if not record:
+            return entry.rows if entry is not None else None
+        if entry is None:
+            # Oversized users are never cached, so their requests aren't lookups at all
+            if not self._bypassed(user_id):
+                self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry.rows
+
+    def put(self, user_id: int, rows: List[WordRow]) -> None:
+        if not self.enabled:
+            return
+        self.invalidate(user_id)
+        rows = tuple(rows)
+        size = sys.getsizeof(rows) + sum(_row_size(row) for row in rows)
+        # A word set bigger than the whole budget would just evict everyone else
+        if size > self.max_bytes:
+            self._oversized[user_id] = time.monotonic()
+            return
+        while self.bytes + size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+        self._entries[user_id] = _Entry(rows, size)
+        self.bytes += size
+
+    def invalidate(self, user_id: int) -> None:
+        self._oversized.pop(user_id, None)
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+def page(rows: Tuple[WordRow, ...], skip: int, limit: int, language: Optional[str] = None) -> List[WordRow]:
+    """Filter by language and slice, matching the database query's semantics"""
+    if language:
+        rows = [row for row in rows if row.language == language]
+    skip = max(skip, 0)
+    return list(rows[skip:skip + limit] if limit >= 0 else rows[skip:])
+
+
+word_cache = WordSetCache()
@@ -138,6 +138,72 @@ class ApiClient {
     });
   }
 
+  // Live word changes for the current user. EventSource can't send headers, so each
+  // connection uses a one-minute stream ticket in the query string instead of the
+  // access token. The browser's own reconnects resume via Last-Event-ID; once the
+  // ticket has expired they fail, and we reopen with a fresh ticket and the last id.
+  // A 'reset' event means changes were missed and the list should be refetched.
+  subscribeToWords(handlers: {
+    created?: (word: Word) => void;
+    updated?: (word: Word) => void;
+    deleted?: (change: { id: number }) => void;
+    reset?: () => void;
+  }): () => void {
+    if (!this.token) {
+      throw new Error('Not authenticated');
+    }
+    let source: EventSource | null = null;
+    let lastEventId = '';
+    let closed = false;
+
+    const listen = <T>(stream: EventSource, type: string, handler?: (data: T) => void) => {
+      stream.addEventListener(type, (e) => {
+        const message = e as MessageEvent;
+        lastEventId = message.lastEventId || lastEventId;
+        handler?.(JSON.parse(message.data));
+      });
+    };
+
+    const connect = async () => {
+      let ticket: string;
+      try {
+        ({ ticket } = await this.request<{ ticket: string }>('/api/words/stream/ticket', {
+          method: 'POST',
+        }));
+      } catch {
+        if (!closed) setTimeout(connect, 3000);
+        return;
+      }
+      if (closed) return;
+      const params = new URLSearchParams({ ticket });
+      if (lastEventId) params.set('last_event_id', lastEventId);
+      const stream = new EventSource(`${this.baseUrl}/api/words/stream?${params}`);
+      listen(stream, 'created', handlers.created);
+      listen(stream, 'updated', handlers.updated);
+      listen(stream, 'deleted', handlers.deleted);
+      listen(stream, 'reset', () => handlers.reset?.());
+      stream.onerror = () => {
+        if (stream.readyState === EventSource.CLOSED && !closed) {
+          setTimeout(connect, 3000);
+        }
+      };
+      source = stream;
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      source?.close();
+    };
+  }
+
+  async patchWord(id: number, changes: Partial<WordCreate>): Promise<Word> {
+    return this.request<Word>(`/api/words/${id}`, {
+      method: 'PATCH',
+      body: JSON.stringify(changes),
+    });
+  }
+
   async deleteWord(id: number): Promise<{ message: string }> {
     return this.request<{ message: string }>(`/api/words/${id}`, {
       method: 'DELETE',